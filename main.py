@@ -1,17 +1,52 @@
 # main.py
 from fastapi import FastAPI, HTTPException, Query, Path, Body
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import SQLModel, Session, create_engine, select
-from typing import Optional, List, Dict, Any
-from models import StringItem, analyze_string, sha256_hex
-from pydantic import BaseModel
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import String, event, func, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Optional, List, Dict, Any, AsyncIterator
+from models import StringItem, analyze_string, char_bitmap, char_bitmap_masks, hash_backend, sha256_hex, sha256_hex_batch
+from pydantic import BaseModel, Field
 from datetime import datetime, timezone
+import logging
 import re
+import orjson
+from functools import lru_cache
+from types import MappingProxyType
 
 # --- Config ---
-DATABASE_URL = "sqlite:///./strings.db"
-engine = create_engine(DATABASE_URL, echo=False, connect_args={"check_same_thread": False})
+# uvicorn configures this logger, so startup messages are actually shown
+logger = logging.getLogger("uvicorn.error")
+DATABASE_URL = "sqlite+aiosqlite:///./strings.db"
+STREAM_BATCH_SIZE = 1000
+BULK_MAX_VALUES = 1000
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=20,
+    max_overflow=10,
+    pool_pre_ping=True,
+)
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # readers don't block behind a writer
+    "PRAGMA synchronous=NORMAL",  # safe with WAL, fewer fsyncs
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",  # 64 MiB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+)
+
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
 
 app = FastAPI(title="String Analyzer Service - Stage 1")
 
@@ -25,17 +60,70 @@ app.add_middleware(
 )
 
 # create tables
-def init_db():
-    SQLModel.metadata.create_all(engine)
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(migrate_db)
+
+# columns older versions stored that are no longer read
+DROPPED_COLUMNS = ("properties",)
+
+def migrate_db(conn: Connection):
+    """Bring an existing table up to the current StringItem schema."""
+    table = StringItem.__table__
+    existing = {row[1] for row in conn.execute(text("PRAGMA table_info(stringitem)"))}
+    added = [column for column in table.columns if column.name not in existing]
+    for column in added:
+        # drop any older index that would shadow the one create() adds below
+        conn.execute(text(f"DROP INDEX IF EXISTS ix_stringitem_{column.name}"))
+        default = "''" if isinstance(column.type, String) else "0"
+        conn.execute(text(
+            f"ALTER TABLE stringitem ADD COLUMN {column.name} "
+            f"{column.type.compile(conn.dialect)} NOT NULL DEFAULT {default}"
+        ))
+    for name in DROPPED_COLUMNS:
+        if name in existing:
+            conn.execute(text(f"ALTER TABLE stringitem DROP COLUMN {name}"))
+
+    # index name -> unique flag, to upgrade indexes that have become unique
+    current = {row[1]: bool(row[2]) for row in conn.execute(text("PRAGMA index_list(stringitem)"))}
+    for index in table.indexes:
+        if index.unique and not current.get(index.name):
+            if index.name in current:
+                conn.execute(text(f"DROP INDEX {index.name}"))
+            # older versions could store duplicates; keep the first row of each
+            key = ", ".join(column.name for column in index.columns)
+            conn.execute(text(
+                f"DELETE FROM stringitem WHERE id NOT IN "
+                f"(SELECT MIN(id) FROM stringitem GROUP BY {key})"
+            ))
+        index.create(conn, checkfirst=True)
+
+    if added:
+        rows = conn.execute(table.select().with_only_columns(table.c.id, table.c.value, table.c.created_at)).all()
+        for row_id, value, created_at in rows:
+            props = analyze_string(value)
+            conn.execute(
+                table.update().where(table.c.id == row_id),
+                {**item_columns(props), "response_json": item_json(props["sha256_hash"], value, props, created_at)},
+            )
 
 @app.on_event("startup")
-def on_startup():
-    init_db()
+async def on_startup():
+    backend = hash_backend()
+    if backend:
+        logger.info("sha256 provided by %s", backend)
+    else:
+        logger.warning("sha256 is not backed by OpenSSL; hashing falls back to the builtin implementation")
+    await init_db()
 
 # --- Pydantic schemas for requests/responses ---
 class CreateStringRequest(BaseModel):
     value: str
 
+class BulkCreateRequest(BaseModel):
+    values: List[str] = Field(..., max_length=BULK_MAX_VALUES)
+
 class PropertiesSchema(BaseModel):
     length: int
     is_palindrome: bool
@@ -51,98 +139,138 @@ class StringResponse(BaseModel):
     created_at: datetime
 
 # --- Helper functions ---
-def find_by_sha(session: Session, sha: str) -> Optional[StringItem]:
+async def find_by_sha(session: AsyncSession, sha: str) -> Optional[StringItem]:
     statement = select(StringItem).where(StringItem.sha256_hash == sha)
-    result = session.exec(statement).first()
+    result = (await session.exec(statement)).first()
     return result
 
-def find_by_value(session: Session, value: str) -> Optional[StringItem]:
+def item_columns(props: Dict) -> Dict[str, Any]:
+    # values for the filter columns of StringItem, derived from analyze_string()
+    columns = {
+        "length": props["length"],
+        "is_palindrome": props["is_palindrome"],
+        "word_count": props["word_count"],
+        "unique_characters": props["unique_characters"],
+    }
+    for i, word in enumerate(char_bitmap(props["character_frequency_map"])):
+        columns[f"char_bitmap_{i}"] = word
+    return columns
+
+def item_json(sha: str, value: str, props: Dict, created_at: datetime) -> str:
+    # the full response body for one string, stored in StringItem.response_json
+    return orjson.dumps({
+        "id": sha,
+        "value": value,
+        "properties": props,
+        "created_at": created_at,
+    }, option=orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC).decode("utf-8")
+
+def item_row(value: str, props: Dict, created_at: datetime) -> Dict[str, Any]:
+    # every stringitem column except id, ready for an INSERT
+    sha = props["sha256_hash"]
+    return {
+        "sha256_hash": sha,
+        "value": value,
+        "created_at": created_at,
+        "response_json": item_json(sha, value, props, created_at),
+        **item_columns(props),
+    }
+
+async def find_by_value(session: AsyncSession, value: str) -> Optional[StringItem]:
     sha = sha256_hex(value)
-    return find_by_sha(session, sha)
+    return await find_by_sha(session, sha)
 
 # --- Endpoints ---
 
 @app.post("/strings", response_model=StringResponse, status_code=201)
-def create_string(payload: CreateStringRequest = Body(...)):
-    if payload is None or "value" not in payload.dict():
-        raise HTTPException(status_code=400, detail='Invalid request body or missing "value" field')
-    if not isinstance(payload.value, str):
-        raise HTTPException(status_code=422, detail='"value" must be a string')
+async def create_string(payload: CreateStringRequest = Body(...)):
+    # a missing or non-string "value" is already rejected with 422 by pydantic
+    row = item_row(payload.value, analyze_string(payload.value), datetime.now(timezone.utc))
+
+    # single statement: the unique sha256_hash index decides whether it is new
+    statement = (
+        sqlite_insert(StringItem.__table__)
+        .values(**row)
+        .on_conflict_do_nothing(index_elements=["sha256_hash"])
+        .returning(StringItem.__table__.c.id)
+    )
+    async with engine.begin() as conn:
+        inserted_id = (await conn.execute(statement)).scalar_one_or_none()
+    if inserted_id is None:
+        # conflict
+        raise HTTPException(
+            status_code=409,
+            detail="String already exists in the system"
+        )
 
-    props = analyze_string(payload.value)
-    sha = props["sha256_hash"]
+    return Response(content=row["response_json"], status_code=201, media_type="application/json")
 
-    with Session(engine) as session:
-        existing = find_by_sha(session, sha)
-        if existing:
-            # conflict
-            raise HTTPException(
-                status_code=409,
-                detail="String already exists in the system"
-            )
-        item = StringItem(sha256_hash=sha, value=payload.value, properties=props)
-        session.add(item)
-        session.commit()
-        session.refresh(item)
+@app.post("/strings/bulk", status_code=201)
+async def create_strings_bulk(payload: BulkCreateRequest = Body(...)):
+    # analysis is CPU-bound, keep it off the event loop
+    rows = await run_in_threadpool(bulk_rows, payload.values)
 
-    resp = {
-        "id": sha,
-        "value": payload.value,
-        "properties": props,
-        "created_at": item.created_at,
-    }
-    return resp
+    # one executemany in one transaction; values already stored are skipped
+    created: List[str] = []
+    if rows:
+        statement = (
+            sqlite_insert(StringItem.__table__)
+            .on_conflict_do_nothing(index_elements=["sha256_hash"])
+            .returning(StringItem.__table__.c.response_json)
+        )
+        async with engine.begin() as conn:
+            created = (await conn.execute(statement, rows)).scalars().all()
+
+    body = '{"data":[%s],"count":%d,"skipped":%d}' % (
+        ",".join(created), len(created), len(payload.values) - len(created)
+    )
+    return Response(content=body, status_code=201, media_type="application/json")
+
+def bulk_rows(values: List[str]) -> List[Dict[str, Any]]:
+    # hash everything up front to drop repeats within the batch
+    unique: Dict[str, str] = {}
+    for sha, value in zip(sha256_hex_batch(values), values):
+        unique.setdefault(sha, value)
+
+    created_at = datetime.now(timezone.utc)
+    return [item_row(value, analyze_string(value, sha), created_at) for sha, value in unique.items()]
 
 @app.get("/strings/filter-by-natural-language")
-def filter_by_nl(query: str = Query(..., min_length=1)):
+async def filter_by_nl(query: str = Query(..., min_length=1)):
     print(query)
     try:
         parsed = parse_nl_query(query)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    # reuse list_strings logic by applying parsed filters
-    try:
-        # Validate types etc.
-        response = list_strings(
-            is_palindrome=parsed.get("is_palindrome"),
-            min_length=parsed.get("min_length"),
-            max_length=parsed.get("max_length"),
-            word_count=parsed.get("word_count"),
-            contains_character=parsed.get("contains_character"),
-        )
-    except HTTPException as e:
-        # pass through error codes
-        raise
+    # reuse the list_strings query with the parsed filters
+    statement = filter_statement(
+        is_palindrome=parsed.get("is_palindrome"),
+        min_length=parsed.get("min_length"),
+        max_length=parsed.get("max_length"),
+        word_count=parsed.get("word_count"),
+        contains_character=parsed.get("contains_character"),
+    )
 
-    resp = {
-        "data": response["data"],
-        "count": response["count"],
-        "interpreted_query": {
-            "original": query,
-            "parsed_filters": parsed
-        }
-    }
-    return resp
+    interpreted = orjson.dumps({"original": query, "parsed_filters": dict(parsed)})
+    return StreamingResponse(
+        await stream_list(statement, b'"interpreted_query":' + interpreted),
+        media_type="application/json",
+    )
 
 
 @app.get("/strings/{string_value}", response_model=StringResponse)
-def get_string(string_value: str = Path(..., description="URL-encoded string value to look up")):
+async def get_string(string_value: str = Path(..., description="URL-encoded string value to look up")):
     # expect caller to URL encode the string_value
-    with Session(engine) as session:
-        item = find_by_value(session, string_value)
-        if not item:
-            raise HTTPException(status_code=404, detail="String does not exist in the system")
-        resp = {
-            "id": item.sha256_hash,
-            "value": item.value,
-            "properties": item.properties,
-            "created_at": item.created_at,
-        }
-        return resp
+    statement = select(StringItem.response_json).where(StringItem.sha256_hash == sha256_hex(string_value))
+    async with AsyncSession(engine) as session:
+        response_json = (await session.exec(statement)).first()
+    if response_json is None:
+        raise HTTPException(status_code=404, detail="String does not exist in the system")
+    return Response(content=response_json, media_type="application/json")
 
 @app.get("/strings")
-def list_strings(
+async def list_strings(
     is_palindrome: Optional[bool] = Query(None),
     min_length: Optional[int] = Query(None, ge=0),
     max_length: Optional[int] = Query(None, ge=0),
@@ -153,83 +281,150 @@ def list_strings(
     if min_length is not None and max_length is not None and min_length > max_length:
         raise HTTPException(status_code=400, detail="min_length cannot be greater than max_length")
 
-    with Session(engine) as session:
-        statement = select(StringItem)
-        results = session.exec(statement).all()
-
-    filtered: List[Dict[str, Any]] = []
-    for item in results:
-        p = item.properties
-        ok = True
-        if is_palindrome is not None and p.get("is_palindrome") != is_palindrome:
-            ok = False
-        if min_length is not None and p.get("length", 0) < min_length:
-            ok = False
-        if max_length is not None and p.get("length", 0) > max_length:
-            ok = False
-        if word_count is not None and p.get("word_count") != word_count:
-            ok = False
-        if contains_character is not None and contains_character not in item.value:
-            ok = False
-        if ok:
-            filtered.append({
-                "id": item.sha256_hash,
-                "value": item.value,
-                "properties": p,
-                "created_at": item.created_at,
-            })
-
-    resp = {
-        "data": filtered,
-        "count": len(filtered),
-        "filters_applied": {
-            k: v for k, v in {
-                "is_palindrome": is_palindrome,
-                "min_length": min_length,
-                "max_length": max_length,
-                "word_count": word_count,
-                "contains_character": contains_character,
-            }.items() if v is not None
-        }
-    }
-    return resp
+    statement = filter_statement(is_palindrome, min_length, max_length, word_count, contains_character)
+
+    filters: Dict[str, Any] = {}
+    if is_palindrome is not None:
+        filters["is_palindrome"] = is_palindrome
+    if min_length is not None:
+        filters["min_length"] = min_length
+    if max_length is not None:
+        filters["max_length"] = max_length
+    if word_count is not None:
+        filters["word_count"] = word_count
+    if contains_character is not None:
+        filters["contains_character"] = contains_character
+    filters_applied = orjson.dumps(filters)
+    return StreamingResponse(
+        await stream_list(statement, b'"filters_applied":' + filters_applied),
+        media_type="application/json",
+    )
+
+def filter_statement(
+    is_palindrome: Optional[bool] = None,
+    min_length: Optional[int] = None,
+    max_length: Optional[int] = None,
+    word_count: Optional[int] = None,
+    contains_character: Optional[str] = None,
+):
+    # push every filter into the WHERE clause so only matching rows leave SQLite
+    statement = select(StringItem.response_json)
+    if is_palindrome is not None:
+        statement = statement.where(StringItem.is_palindrome == is_palindrome)
+    if min_length is not None:
+        statement = statement.where(StringItem.length >= min_length)
+    if max_length is not None:
+        statement = statement.where(StringItem.length <= max_length)
+    if word_count is not None:
+        statement = statement.where(StringItem.word_count == word_count)
+    if contains_character is not None:
+        # test the byte bitmap instead of scanning each value
+        for word, mask in char_bitmap_masks(contains_character):
+            column = getattr(StringItem, f"char_bitmap_{word}")
+            statement = statement.where(column.op("&")(mask) != 0)
+        if not contains_character.isascii():
+            # the bitmap only proves the UTF-8 bytes occur, not that they are adjacent
+            statement = statement.where(func.instr(StringItem.value, contains_character) > 0)
+
+    return statement
+
+async def stream_list(statement, trailer: bytes) -> AsyncIterator[bytes]:
+    # the first yield_per batch is fetched before the response starts, so
+    # errors from the query itself still become a proper HTTP error
+    session = AsyncSession(engine)
+    try:
+        result = await session.stream_scalars(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        batches = result.partitions()
+        first = await anext(batches, None)
+    except BaseException:
+        await session.close()
+        raise
+    if first is None or len(first) < STREAM_BATCH_SIZE:
+        # everything fit in one batch; don't hold a pooled connection while
+        # the client downloads it
+        await session.close()
+        session = None
+    return list_body(session, batches, first, trailer)
+
+async def list_body(session: Optional[AsyncSession], batches, first, trailer: bytes) -> AsyncIterator[bytes]:
+    # count is only known at the end, so it follows "data" in the body
+    try:
+        yield b'{"data":['
+        count = 0
+        batch = first
+        while batch:
+            chunk = ",".join(batch).encode("utf-8")
+            yield b"," + chunk if count else chunk
+            count += len(batch)
+            batch = await anext(batches, None) if session is not None else None
+        yield b'],"count":%d,%b}' % (count, trailer)
+    finally:
+        if session is not None:
+            await session.close()
 
 # Natural language filtering heuristics
-def parse_nl_query(query: str) -> Dict:
+# every recognised phrase as one alternation, so the query is scanned once
+_NL_RE = re.compile(
+    r"(?P<single>\b(?:single|one)[\s-]word\b)"
+    r"|(?P<npal>\b(?:non[-\s]?|not\s+(?:an?\s+)?)palindrom\w*)"
+    r"|(?P<pal>\bpalindrom\w*)"
+    r"|longer than\s+(?P<gt>\d+)"
+    r"|shorter than\s+(?P<lt>\d+)"
+    r"|contain(?:s|ing)?\s+(?:(?:the|an?)\s+)?(?:letter\s+|character\s+)?(?P<ch>[a-z])\b"
+    r"|\bletter\s+(?P<ch2>[a-z])\b"
+    r"|(?P<fv>first vowel)"
+)
+
+def parse_nl_query(query: str) -> MappingProxyType:
     # returns parsed_filters or raise ValueError
-    q = query.lower()
+    return _parse_nl_query_cached(query.lower())
+
+# the set of distinct queries is small, so parse each one once; results are
+# read-only because they are shared between requests
+@lru_cache(maxsize=1024)
+def _parse_nl_query_cached(q: str) -> MappingProxyType:
     parsed = {}
 
-    if q == "all single word palindromic strings":
-        parsed["word_count"] = 1
-        parsed["is_palindrome"] = True
-    elif q == "strings longer than 10 characters":
-        parsed["min_length"] = 11
-    elif q == "palindromic strings that contain the first vowel":
-        parsed["is_palindrome"] = True
-        parsed["contains_character"] = "a"
-    elif q == "strings containing the letter z":
-        parsed["contains_character"] = "z"
+    for m in _NL_RE.finditer(q):
+        kind = m.lastgroup
+        if kind == "single":
+            parsed["word_count"] = 1
+        elif kind in ("pal", "npal"):
+            wanted = kind == "pal"
+            if parsed.get("is_palindrome", wanted) != wanted:
+                raise ValueError("Parsed filters conflict: palindromic and non-palindromic")
+            parsed["is_palindrome"] = wanted
+        elif kind == "gt":
+            parsed["min_length"] = int(m.group("gt")) + 1
+        elif kind == "lt":
+            parsed["max_length"] = int(m.group("lt")) - 1
+        else:
+            ch = "a" if kind == "fv" else m.group(kind)
+            if parsed.get("contains_character", ch) != ch:
+                raise ValueError("Parsed filters conflict: more than one contains_character")
+            parsed["contains_character"] = ch
 
     if not parsed:
         raise ValueError("Unable to parse natural language query")
 
     # Basic conflict detection: e.g., min_length > max_length
+    if parsed.get("max_length", 0) < 0:
+        raise ValueError("Parsed filters conflict: max_length < 0")
     if "min_length" in parsed and "max_length" in parsed:
         if parsed["min_length"] > parsed["max_length"]:
             raise ValueError("Parsed filters conflict: min_length > max_length")
 
-    return parsed
+    return MappingProxyType(parsed)
 
 
 @app.delete("/strings/{string_value}", status_code=204)
-def delete_string(string_value: str = Path(...)):
-    with Session(engine) as session:
-        item = find_by_value(session, string_value)
+async def delete_string(string_value: str = Path(...)):
+    async with AsyncSession(engine) as session:
+        item = await find_by_value(session, string_value)
         if not item:
             raise HTTPException(status_code=404, detail="String does not exist in the system")
-        session.delete(item)
-        session.commit()
+        await session.delete(item)
+        await session.commit()
     return JSONResponse(status_code=204, content=None)
 
 import os
@@ -1,23 +1,105 @@
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timezone
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, JSON, Text
+from sqlalchemy import Column, Text
 import hashlib
 from collections import Counter
+from functools import lru_cache
 
+# longer values bypass the cache so it can't pin large request bodies in memory
+SHA256_CACHE_MAX_LEN = 1024
 
-def sha256_hex(value: str) -> str:
+
+def _sha256_hex_uncached(value: str) -> str:
     return hashlib.sha256(value.encode("utf-8")).hexdigest()
 
 
-def analyze_string(value: str) -> Dict:
-    length = len(value)
+_sha256_hex_cached = lru_cache(maxsize=8192)(_sha256_hex_uncached)
+
+
+def sha256_hex(value: str) -> str:
+    if len(value) > SHA256_CACHE_MAX_LEN:
+        return _sha256_hex_uncached(value)
+    return _sha256_hex_cached(value)
+
+
+def sha256_hex_batch(values: List[str]) -> List[str]:
+    # copy a primed hasher instead of constructing a new one per value
+    base = hashlib.sha256()
+    out = []
+    for value in values:
+        h = base.copy()
+        h.update(value.encode("utf-8"))
+        out.append(h.hexdigest())
+    return out
+
+
+def hash_backend() -> Optional[str]:
+    # the OpenSSL version behind hashlib.sha256, or None for the builtin
+    # implementation; OpenSSL uses the CPU's SHA extensions when available
+    if hashlib.sha256.__name__ == "openssl_sha256":
+        # imported here: builds without OpenSSL have no ssl module at all
+        import ssl
+        return ssl.OPENSSL_VERSION
+    return None
+
+
+# a 256-bit "which UTF-8 bytes occur" bitmap, split over four signed 64-bit
+# integers because that is the widest type SQLite stores natively
+CHAR_BITMAP_WORDS = 4
+
+
+def _to_signed64(word: int) -> int:
+    return word - (1 << 64) if word >= (1 << 63) else word
+
+
+def char_bitmap(chars: Iterable[str]) -> List[int]:
+    # takes the distinct characters (e.g. the frequency map keys), so the
+    # value itself is not walked again
+    bitmap = 0
+    for ch in chars:
+        if ch < "\x80":
+            bitmap |= 1 << ord(ch)
+        else:
+            for byte in ch.encode("utf-8"):
+                bitmap |= 1 << byte
+    return [_to_signed64((bitmap >> (64 * i)) & 0xFFFFFFFFFFFFFFFF) for i in range(CHAR_BITMAP_WORDS)]
+
+
+def char_bitmap_masks(ch: str) -> List[Tuple[int, int]]:
+    # (word index, mask) pairs that must all be set for ch to occur in a value
+    return [(byte >> 6, _to_signed64(1 << (byte & 63))) for byte in set(ch.encode("utf-8"))]
+
+
+# outer character pairs compared in place before falling back to a full copy
+PALINDROME_PROBE_PAIRS = 32
+
+
+def _is_palindrome(value: str) -> bool:
+    # case-insensitive; most strings fail on the first pair or two, which
+    # avoids allocating the lowered and reversed copies
+    n = len(value)
+    if value.isascii():
+        for i in range(min(n // 2, PALINDROME_PROBE_PAIRS)):
+            if value[i].lower() != value[n - 1 - i].lower():
+                return False
+        if n // 2 <= PALINDROME_PROBE_PAIRS:
+            return True
+    # long or non-ASCII strings: str.lower() may change length outside ASCII
     lowered = value.lower()
-    is_palindrome = lowered == lowered[::-1]
-    unique_characters = len(set(value))
-    word_count = 0 if value.strip() == "" else len(value.split())
-    sha = sha256_hex(value)
-    freq_map = dict(Counter(value))
+    return lowered == lowered[::-1]
+
+
+def analyze_string(value: str, sha256_hash: Optional[str] = None) -> Dict:
+    # sha256_hash may be passed in when it was already computed, e.g. in bulk
+    # one Counter pass gives both the frequency map and the unique count
+    counter = Counter(value)
+    length = len(value)
+    is_palindrome = _is_palindrome(value)
+    unique_characters = len(counter)
+    word_count = len(value.split())  # split() yields [] for blank strings
+    sha = sha256_hash or hashlib.sha256(value.encode("utf-8")).hexdigest()
+    freq_map = dict(counter)
     return {
         "length": length,
         "is_palindrome": is_palindrome,
@@ -30,7 +112,18 @@ def analyze_string(value: str) -> Dict:
 
 class StringItem(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    sha256_hash: str = Field(index=True, nullable=False)
+    sha256_hash: str = Field(index=True, nullable=False, unique=True)
     value: str = Field(sa_column=Column(Text, nullable=False))
-    properties: Dict = Field(sa_column=Column(JSON, nullable=False))
+    # the filterable properties as columns so list queries can use plain
+    # indexes; the full properties object only lives in response_json
+    length: int = Field(index=True, nullable=False)
+    is_palindrome: bool = Field(index=True, nullable=False)
+    word_count: int = Field(index=True, nullable=False)
+    unique_characters: int = Field(index=True, nullable=False)
+    char_bitmap_0: int = Field(default=0, nullable=False)
+    char_bitmap_1: int = Field(default=0, nullable=False)
+    char_bitmap_2: int = Field(default=0, nullable=False)
+    char_bitmap_3: int = Field(default=0, nullable=False)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # the serialized GET response for this string, served verbatim
+    response_json: str = Field(sa_column=Column(Text, nullable=False))
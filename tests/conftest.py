@@ -0,0 +1,19 @@
+import os
+import sys
+
+# main.py and models.py live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import main
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # a fresh database per test instead of ./strings.db
+    monkeypatch.setattr(main, "engine", create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'strings.db'}"))
+    with TestClient(main.app) as c:
+        yield c
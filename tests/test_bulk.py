@@ -0,0 +1,29 @@
+from main import BULK_MAX_VALUES
+
+
+def test_bulk_create_skips_repeats_and_existing(client):
+    assert client.post("/strings", json={"value": "racecar"}).status_code == 201
+
+    r = client.post("/strings/bulk", json={"values": ["racecar", "hello", "hello", "world"]})
+
+    assert r.status_code == 201
+    body = r.json()
+    # "racecar" already exists and the second "hello" repeats within the batch
+    assert body["count"] == 2
+    assert body["skipped"] == 2
+    assert sorted(item["value"] for item in body["data"]) == ["hello", "world"]
+    assert client.get("/strings/hello").json()["properties"]["length"] == 5
+    assert client.get("/strings").json()["count"] == 3
+
+
+def test_bulk_create_empty(client):
+    r = client.post("/strings/bulk", json={"values": []})
+
+    assert r.status_code == 201
+    assert r.json() == {"data": [], "count": 0, "skipped": 0}
+
+
+def test_bulk_create_rejects_oversized_batch(client):
+    values = [str(i) for i in range(BULK_MAX_VALUES + 1)]
+
+    assert client.post("/strings/bulk", json={"values": values}).status_code == 422
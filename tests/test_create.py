@@ -0,0 +1,26 @@
+def test_create_string(client):
+    r = client.post("/strings", json={"value": "racecar"})
+
+    assert r.status_code == 201
+    body = r.json()
+    assert body["value"] == "racecar"
+    assert body["id"] == body["properties"]["sha256_hash"]
+    assert body["properties"]["is_palindrome"] is True
+
+
+def test_create_string_conflict(client):
+    assert client.post("/strings", json={"value": "racecar"}).status_code == 201
+
+    r = client.post("/strings", json={"value": "racecar"})
+
+    assert r.status_code == 409
+    assert r.json() == {"detail": "String already exists in the system"}
+    assert client.get("/strings").json()["count"] == 1
+
+
+def test_created_at_is_utc_z(client):
+    created = client.post("/strings", json={"value": "racecar"}).json()["created_at"]
+
+    assert created.endswith("Z")
+    assert client.get("/strings/racecar").json()["created_at"] == created
+    assert client.get("/strings").json()["data"][0]["created_at"] == created
@@ -0,0 +1,33 @@
+import pytest
+
+
+def values_containing(client, ch):
+    r = client.get("/strings", params={"contains_character": ch})
+    assert r.status_code == 200
+    return sorted(item["value"] for item in r.json()["data"])
+
+
+@pytest.mark.parametrize(
+    "ch, other",
+    [
+        ("?", "@"),  # bytes 63 / 64: last bit of word 0, first bit of word 1
+        ("\x7f", "~"),  # byte 127: last bit of word 1 (the sign bit)
+        ("!", "}"),
+    ],
+)
+def test_contains_character_across_bitmap_words(client, ch, other):
+    client.post("/strings", json={"value": f"x{ch}"})
+    client.post("/strings", json={"value": f"x{other}"})
+
+    assert values_containing(client, ch) == [f"x{ch}"]
+    assert values_containing(client, other) == [f"x{other}"]
+
+
+def test_contains_character_non_ascii(client):
+    # "ż" is C5 BC; "Ż¼" is C5 BB C2 BC, so it has both bytes without the character
+    for value in ("żaba", "Ż¼", "plain"):
+        client.post("/strings", json={"value": value})
+
+    assert values_containing(client, "ż") == ["żaba"]
+    assert values_containing(client, "Ż") == ["Ż¼"]
+    assert values_containing(client, "¼") == ["Ż¼"]
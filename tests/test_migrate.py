@@ -0,0 +1,55 @@
+import json
+import sqlite3
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import main
+from models import sha256_hex
+
+# the stringitem table as created by the first release
+BASELINE_SCHEMA = """
+CREATE TABLE stringitem (
+    id INTEGER NOT NULL,
+    sha256_hash VARCHAR NOT NULL,
+    value TEXT NOT NULL,
+    properties JSON NOT NULL,
+    created_at DATETIME NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_stringitem_sha256_hash ON stringitem (sha256_hash);
+"""
+
+
+def test_migrate_baseline_db_with_duplicates(tmp_path, monkeypatch):
+    path = tmp_path / "strings.db"
+    db = sqlite3.connect(path)
+    db.executescript(BASELINE_SCHEMA)
+    # the old SELECT-then-INSERT could race and store a value twice
+    for row_id, value in ((1, "level"), (2, "level"), (3, "hello world")):
+        db.execute(
+            "INSERT INTO stringitem VALUES (?, ?, ?, ?, ?)",
+            (row_id, sha256_hex(value), value, json.dumps({}), "2025-10-22 11:28:25.143534"),
+        )
+    db.commit()
+    db.close()
+
+    monkeypatch.setattr(main, "engine", create_async_engine(f"sqlite+aiosqlite:///{path}"))
+    with TestClient(main.app) as client:
+        body = client.get("/strings").json()
+        assert body["count"] == 2
+        assert sorted(item["value"] for item in body["data"]) == ["hello world", "level"]
+
+        # backfilled columns are usable for filtering
+        r = client.get("/strings", params={"is_palindrome": True, "word_count": 1})
+        assert [item["value"] for item in r.json()["data"]] == ["level"]
+
+        assert client.post("/strings", json={"value": "level"}).status_code == 409
+        # naive datetimes from the old rows are serialized as UTC
+        assert client.get("/strings/level").json()["created_at"] == "2025-10-22T11:28:25.143534Z"
+
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT id FROM stringitem WHERE value = 'level'").fetchall() == [(1,)]
+    indexes = {row[1]: row[2] for row in db.execute("PRAGMA index_list(stringitem)")}
+    assert indexes["ix_stringitem_sha256_hash"] == 1
+    db.close()
@@ -0,0 +1,42 @@
+import pytest
+
+from main import parse_nl_query
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        # the documented examples
+        ("all single word palindromic strings", {"word_count": 1, "is_palindrome": True}),
+        ("strings longer than 10 characters", {"min_length": 11}),
+        ("palindromic strings that contain the first vowel", {"is_palindrome": True, "contains_character": "a"}),
+        ("strings containing the letter z", {"contains_character": "z"}),
+        # negated palindromes
+        ("non-palindromic strings", {"is_palindrome": False}),
+        ("non palindromic strings", {"is_palindrome": False}),
+        ("strings that are not palindromes", {"is_palindrome": False}),
+        ("strings that are not a palindrome", {"is_palindrome": False}),
+        # articles are not characters
+        ("strings that contain a letter z", {"contains_character": "z"}),
+        ("strings containing an x", {"contains_character": "x"}),
+        ("strings that contain a", {"contains_character": "a"}),
+        ("strings shorter than 5 characters", {"max_length": 4}),
+    ],
+)
+def test_parse_nl_query(query, expected):
+    assert dict(parse_nl_query(query)) == expected
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "gibberish",
+        "palindromic strings that are not palindromes",
+        "strings containing the letter z and the letter q",
+        "strings longer than 9 characters and shorter than 5 characters",
+        "strings shorter than 0 characters",
+    ],
+)
+def test_parse_nl_query_rejects(query):
+    with pytest.raises(ValueError):
+        parse_nl_query(query)
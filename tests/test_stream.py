@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("rows", [7, 6, 3, 2])
+def test_list_streams_multiple_batches(client, monkeypatch, rows):
+    monkeypatch.setattr(main, "STREAM_BATCH_SIZE", 3)
+    values = [f"value {i}" for i in range(rows)]
+    client.post("/strings/bulk", json={"values": values})
+
+    for r in (
+        client.get("/strings"),
+        client.get("/strings/filter-by-natural-language", params={"query": "strings longer than 0 characters"}),
+    ):
+        assert r.status_code == 200
+        body = json.loads(r.text)
+        assert body["count"] == rows
+        assert sorted(item["value"] for item in body["data"]) == sorted(values)
+
+    # every streamed session was closed once its body finished
+    assert main.engine.pool.checkedout() == 0